@@ -1,20 +1,27 @@
 import math
 from flask import Flask, request, render_template, send_file, Response, url_for
 import io, base64, os, json, traceback
+from collections import OrderedDict
+import threading
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import plotly.graph_objs as go
 import folium
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.utils import ImageReader
 
 from src.data_loader import load_growth_curves, load_species_master
-from src.model import agb_from_chave, total_biomass_kg, biomass_to_co2
-from src.climate import climate_at_latlon  # <-- climate sampler (WorldClim)
+from src.model import total_biomass_kg, biomass_to_co2
+from src.allometry import build_registry, equation_for
+from src.tables import build_species_tables
+from src.figure_spec import co2_figure_spec
+from src.inverse import build_inverse_index, trees_needed, years_needed
+from src.sensitivity import sensitivity_summary
+from src.climate import climate_at_latlon, climate_multiplier_from_mat_map, use_grids, close_datasets  # <-- climate sampler (WorldClim)
+from src import shared
 
 # Use explicit folders
 app = Flask(__name__, template_folder="templates", static_folder="static")
@@ -42,15 +49,49 @@ def _safe_load_data():
 DF_GROWTH, DF_SPECIES = _safe_load_data()
 SPECIES_LIST = sorted(DF_SPECIES["species"].dropna().unique().tolist()) if (DF_SPECIES is not None and "species" in DF_SPECIES.columns) else []
 
+# Allometric equations compiled once from the species master (equation_expression / equation_type)
+try:
+    ALLOMETRY = build_registry(DF_SPECIES) if DF_SPECIES is not None else None
+except Exception as e:
+    print("[DATA] ERROR allometry:", e)
+    traceback.print_exc()
+    ALLOMETRY = None
+
+# Per-tree CO₂ matrices for all species, for inverse (target) and sensitivity queries
+try:
+    SPECIES_INDEX = build_inverse_index(build_species_tables(DF_GROWTH, DF_SPECIES, ALLOMETRY)) if (DF_GROWTH is not None and ALLOMETRY is not None) else None
+except Exception as e:
+    print("[DATA] ERROR inverse index:", e)
+    traceback.print_exc()
+    SPECIES_INDEX = None
+
+# Optional (AFFOREST_SHARED=1, see gunicorn.conf.py): with preload_app the master
+# writes the numeric arrays and climate grids to shared memory once, then every
+# forked worker reads the same read-only memory maps instead of its own copies.
+SHARED_MODE = shared.enabled()
+if SHARED_MODE:
+    try:
+        SHARED_DIR = shared.create_dir()  # private to this master, removed at exit
+        if SPECIES_INDEX is not None:
+            SPECIES_INDEX = shared.share_index(SPECIES_INDEX, SHARED_DIR)
+        use_grids(shared.share_climate_grids(SHARED_DIR))
+        close_datasets()  # no rasterio handles inherited across fork
+        print("[DATA] shared arrays in:", SHARED_DIR)
+    except Exception as e:
+        print("[DATA] ERROR shared mode, using per-process data:", e)
+        traceback.print_exc()
+        SHARED_MODE = False
+
 # ---------- Core model (with optional climate scaling) ----------
 def compute_curve(species: str, years: int, trees: int, lat=None, lon=None):
-    if DF_GROWTH is None or DF_SPECIES is None:
+    if DF_GROWTH is None or DF_SPECIES is None or ALLOMETRY is None:
         return None, "Datasets failed to load."
 
     if "species_scientific" not in DF_GROWTH.columns:
         return None, "Column 'species_scientific' missing in growth dataset."
 
-    g = DF_GROWTH[DF_GROWTH["species_scientific"] == species].copy()
+    # one record per age, first one wins (same rule as src.tables.build_species_tables)
+    g = DF_GROWTH[DF_GROWTH["species_scientific"] == species].drop_duplicates(subset="age_years", keep="first")
     if g.empty:
         return None, f"No growth records for '{species}'."
 
@@ -72,7 +113,7 @@ def compute_curve(species: str, years: int, trees: int, lat=None, lon=None):
     surv = float(srow.get("annual_survival_rate", 0.95))
 
     # biomass
-    agb = agb_from_chave(g["dbh_cm"].values, g["height_m"].values, rho)  # kg per tree
+    agb = equation_for(ALLOMETRY, species)["agb"](g["dbh_cm"].values, g["height_m"].values, rho)  # kg per tree
     total_biomass = total_biomass_kg(agb, R)  # kg per tree
 
     # survival
@@ -117,6 +158,42 @@ def compute_multi(species_list, years: int, trees: int):
         results.append(df)
     return results, None
 
+
+def solve_target(target_t: float, years: int, trees: int, top: int | None = None):
+    """Ranked answers to: trees needed in `years`, and years needed with `trees`, for `target_t` t CO₂."""
+    if SPECIES_INDEX is None:
+        return None, "Datasets failed to load."
+    if not math.isfinite(target_t) or target_t <= 0:
+        return None, "CO₂ target must be a positive, finite number."
+    if years < 0:
+        return None, "Years must be zero or more."
+    if trees < 1:
+        return None, "Trees must be at least 1."
+
+    by_trees = trees_needed(SPECIES_INDEX, target_t, years)
+    by_years = years_needed(SPECIES_INDEX, target_t, trees)
+    n = len(by_trees["species"]) if not top else min(top, len(by_trees["species"]))
+
+    return {
+        "target_t": target_t,
+        "trees_needed": [
+            {"species": by_trees["species"][i],
+             "trees_needed": None if np.isnan(by_trees["trees_needed"][i]) else int(by_trees["trees_needed"][i]),
+             "co2_per_tree_t": round(float(by_trees["co2_per_tree_t"][i]), 4)}
+            for i in range(n)
+        ],
+        "years_needed": [
+            {"species": by_years["species"][i],
+             "years_needed": None if np.isnan(by_years["years_needed"][i]) else int(by_years["years_needed"][i]),
+             "co2_at_horizon_t": round(float(by_years["co2_at_horizon_t"][i]), 3)}
+            for i in range(n)
+        ],
+    }, None
+
+def _bad_int_args(args, *names):
+    """Query args that were given but are not integers (JSON endpoints answer 400)."""
+    return [n for n in names if n in args and args.get(n, type=int) is None]
+
 # ---------- Plot helpers ----------
 def plot_matplotlib_overlay(dfs, years, trees):
     """Return base64 PNG overlay of yearly bars (stacked) + lines for cumulative per species."""
@@ -148,57 +225,33 @@ def plot_matplotlib_overlay(dfs, years, trees):
     return "data:image/png;base64," + base64.b64encode(buf.read()).decode("utf-8")
 
 
-def make_plotly_json(dfs):
-    """Return JSON serializable figure for interactive chart."""
-    traces = []
-    ages = dfs[0]["age_years"].tolist()
-    stacked = np.sum([df["CO2_tons"].values for df in dfs], axis=0).tolist()
-    traces.append(go.Bar(x=ages, y=stacked, name="Total yearly CO₂ (t)", opacity=0.35))
+_FIGURE_CACHE = OrderedDict()   # (species, years, trees) → JSON body, least recently used first
+_FIGURE_CACHE_SIZE = 256
+_FIGURE_LOCK = threading.Lock()
 
-    for df in dfs:
-        traces.append(go.Scatter(
-            x=df["age_years"].tolist(),
-            y=df["CO2_cumulative_tons"].tolist(),
-            mode="lines+markers",
-            name=f"{df['species'].iloc[0]} (cum)"
-        ))
-
-    layout = go.Layout(
-        title="Interactive CO₂ Sequestration",
-        xaxis=dict(title="Age (years)"),
-        yaxis=dict(title="CO₂ (tons)"),
-        hovermode="x unified",
-        legend=dict(orientation="h")
-    )
-    fig = go.Figure(data=traces, layout=layout)
-    return json.loads(fig.to_json())
-
-# ---- Climate response curve (documented, not dummy) ----
-def climate_multiplier_from_mat_map(mat_c, map_mm):
+def figure_json(species: tuple, years: int, trees: int, dfs=None):
     """
-    mat_c: mean annual temperature in °C
-    map_mm: mean annual precipitation in mm
-    Returns a scalar multiplier ~[0.5, 1.6]
+    Serialized Plotly figure spec for the dashboard chart (cached per input set).
+    Pass `dfs` when the curves are already computed (the dashboard page does) so
+    the cache is filled without running the simulation again.
     """
-    if mat_c is None or map_mm is None:
-        return 1.0, {"mat_c": None, "map_mm": None, "temp_factor": None, "rain_factor": None, "multiplier": 1.0}
-
-    # Temperature bell curve centered ~25C with wide tolerance
-    temp_factor = math.exp(-((mat_c - 25.0) / 12.0) ** 2)
-
-    # Rainfall saturating response; approaches ~1.2 in very wet climates
-    rain_factor = (1.0 - math.exp(-map_mm / 900.0)) * 1.2
-
-    mult = max(0.5, min(1.6, temp_factor * rain_factor))
+    key = (tuple(species), years, trees)
+    with _FIGURE_LOCK:
+        if key in _FIGURE_CACHE:
+            _FIGURE_CACHE.move_to_end(key)
+            return _FIGURE_CACHE[key], None
+
+    if dfs is None:
+        dfs, err = compute_multi(list(species), years, trees)
+        if err:
+            return None, err
+    body = json.dumps(co2_figure_spec(dfs), ensure_ascii=False, separators=(",", ":"))
 
-    dbg = {
-        "mat_c": round(mat_c, 2),
-        "map_mm": round(map_mm, 0),
-        "temp_factor": round(temp_factor, 3),
-        "rain_factor": round(rain_factor, 3),
-        "multiplier": round(mult, 3),
-    }
-    return mult, dbg
+    with _FIGURE_LOCK:
+        _FIGURE_CACHE[key] = body
+        if len(_FIGURE_CACHE) > _FIGURE_CACHE_SIZE:
+            _FIGURE_CACHE.popitem(last=False)
+    return body, None
 
 # ---------- Landing page ----------
 @app.route("/")
@@ -211,21 +264,26 @@ def app_page():
     years = int(request.form.get("years", 20))
     trees = int(request.form.get("trees", 100))
 
+    target_t = request.form.get("target_t", type=float)
+    show_sensitivity = bool(request.form.get("sensitivity"))
+
     sel_species = request.form.getlist("species")
     if not sel_species:
         sel_species = [SPECIES_LIST[0]] if SPECIES_LIST else []
 
     dfs, error = (None, None)
     plot_url = None
-    plotly_fig = None
     table_rows = []
+    target = None
+    target_error = None
+    sensitivity = []
 
     try:
         if sel_species:
             dfs, error = compute_multi(sel_species, years, trees)
             if not error:
                 plot_url = plot_matplotlib_overlay(dfs, years, trees)
-                plotly_fig = make_plotly_json(dfs)
+                figure_json(tuple(sel_species), years, trees, dfs)  # the chart fetch then hits the cache
                 for df in dfs:
                     last = df.iloc[-1]
                     table_rows.append({
@@ -235,12 +293,17 @@ def app_page():
                         "co2_year_t": round(float(last["CO2_tons"]), 3),
                         "co2_cum_t": round(float(last["CO2_cumulative_tons"]), 3)
                     })
+        if target_t is not None:
+            target, target_error = solve_target(target_t, years, trees, top=10)
+        if show_sensitivity and SPECIES_INDEX is not None and not error:
+            sensitivity = sensitivity_summary(SPECIES_INDEX, sel_species, years, trees)
     except Exception as e:
         error = f"Unexpected error: {e}"
         traceback.print_exc()
 
     csv_url = url_for("export_csv") + "?" + "&".join([f"species={s}" for s in sel_species]) + f"&years={years}&trees={trees}"
     pdf_url = url_for("export_pdf") + "?" + "&".join([f"species={s}" for s in sel_species]) + f"&years={years}&trees={trees}"
+    figure_url = url_for("figure_spec", species=sel_species, years=years, trees=trees)
 
     return render_template(
         "index.html",
@@ -250,12 +313,39 @@ def app_page():
         trees=trees,
         error=error,
         plot_url=plot_url,
-        plotly_fig=plotly_fig,
+        figure_url=figure_url,
         table_rows=table_rows,
+        target_t=target_t,
+        target=target,
+        target_error=target_error,
+        show_sensitivity=show_sensitivity,
+        sensitivity=sensitivity,
         csv_url=csv_url,
         pdf_url=pdf_url
     )
 
+# ---------- Chart data (standalone, cacheable) ----------
+@app.route("/app/figure.json")
+def figure_spec():
+    species = request.args.getlist("species")
+    years = request.args.get("years", 20, type=int)
+    trees = request.args.get("trees", 100, type=int)
+    if not species:
+        return Response("species required", status=400)
+    bad = _bad_int_args(request.args, "years", "trees")
+    if bad:
+        return Response(f"{', '.join(bad)} must be an integer", status=400)
+
+    body, err = figure_json(tuple(species), years, trees)
+    if err:
+        return Response(err, status=400)
+
+    resp = Response(body, mimetype="application/json")
+    resp.cache_control.public = True
+    resp.cache_control.max_age = 3600
+    resp.add_etag()
+    return resp.make_conditional(request)
+
 # ---------- Exports ----------
 @app.route("/export/csv")
 def export_csv():
@@ -389,10 +479,27 @@ def map_view():
         map_name=map_name,
     )
 
+@app.route("/api/inverse")
+def api_inverse():
+    target_t = request.args.get("target_t", type=float)
+    years = request.args.get("years", 20, type=int)
+    trees = request.args.get("trees", 100, type=int)
+    if target_t is None:
+        msg = "target_t must be a number" if "target_t" in request.args else "target_t required"
+        return Response(msg, status=400)
+    bad = _bad_int_args(request.args, "years", "trees")
+    if bad:
+        return Response(f"{', '.join(bad)} must be an integer", status=400)
+
+    result, err = solve_target(target_t, years, trees)
+    if err:
+        return Response(err, status=400)
+    return result
+
 @app.route("/health")
 def health():
     ok = (DF_GROWTH is not None) and (DF_SPECIES is not None) and (len(SPECIES_LIST) > 0)
-    return {"ok": ok, "species_count": len(SPECIES_LIST)}
+    return {"ok": ok, "species_count": len(SPECIES_LIST), "shared": SHARED_MODE}
 
 if __name__ == "__main__":
     print("Template folder:", os.path.abspath(app.template_folder or "templates"))
@@ -0,0 +1,11 @@
+# gunicorn.conf.py — run with: gunicorn -c gunicorn.conf.py app:app
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:5050")
+workers = int(os.environ.get("WEB_CONCURRENCY", "4"))
+
+# Import app.py (datasets, species index, climate grids) once in the master and
+# fork workers from it. With AFFOREST_SHARED the numeric arrays and rasters are
+# memory-mapped read-only from shared memory, so adding workers adds no copies.
+preload_app = True
+os.environ.setdefault("AFFOREST_SHARED", "1")
@@ -1,12 +1,14 @@
 import sys
+import argparse
 from src.data_loader import load_growth_curves, load_species_master
 from src.model import biomass_to_co2
+from src.allometry import build_registry, equation_for
 from src.visualize import plot_co2
 
 def main():
     # --- Load datasets ---
-    df_growth = load_growth_curves("data/growth_curves_filled.csv")
-    df_species = load_species_master("data/species_master_filled.csv")
+    df_growth = load_growth_curves()
+    df_species = load_species_master()
 
     # --- Debug: print available columns ---
     print("\n✅ Loaded species master with columns:", list(df_species.columns))
@@ -19,7 +21,7 @@ def main():
             break
 
     if not species_col:
-        print("❌ Could not find a species column in species_master_filled.csv")
+        print("❌ Could not find a species column in the species master.")
         sys.exit(1)
 
     print("\n🌱 Afforestation Impact Modeling 🌱\n")
@@ -73,8 +75,9 @@ def main():
             print(f"❌ Wood density not found for species '{species}'.")
             sys.exit(1)
         wood_density = float(wood_density[0])
-        # Calculate biomass using Chave et al. 2014 formula
-        species_growth["Biomass_kg"] = 0.0673 * (wood_density * species_growth["dbh_cm"]**2 * species_growth["height_m"])**0.976
+        # Calculate biomass with the species' allometry (Chave et al. 2014 unless the master says otherwise)
+        agb = equation_for(build_registry(df_species), species)["agb"]
+        species_growth["Biomass_kg"] = agb(species_growth["dbh_cm"].values, species_growth["height_m"].values, wood_density)
         species_growth["CO2_sequestered_per_tree"] = species_growth["Biomass_kg"].apply(biomass_to_co2)
         species_growth["Total_CO2_sequestered"] = species_growth["CO2_sequestered_per_tree"] * trees
     else:
@@ -100,7 +103,35 @@ def main():
         species_list = input("Enter species names separated by commas: ").split(",")
         species_list = [s.strip() for s in species_list]
         from src.simulate import compare_species
-        compare_species(species_list, years, trees)
+        compare_species(species_list, years, trees, df_growth, df_species)
+
+def batch_main(argv=None):
+    """Non-interactive batch mode: python main.py batch scenarios.csv -o results.csv"""
+    parser = argparse.ArgumentParser(prog="main.py batch", description="Run many afforestation scenarios in parallel.")
+    parser.add_argument("scenarios", help="CSV/Parquet with columns: city (or site), lat, lon, species, years, trees, survival")
+    parser.add_argument("-o", "--out", default="sim_results_batch.csv", help="Output .csv or .parquet (sim_results_v2 schema)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: CPU count; 1 = in-process)")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Scenarios per worker task")
+    parser.add_argument("--growth", default=None, help="Growth curves CSV (default: data/growth_curves_filled[_v2].csv)")
+    parser.add_argument("--species-master", default=None, help="Species master CSV (default: data/species_master_filled[_v2].csv)")
+    parser.add_argument("--no-climate", action="store_true", help="Skip WorldClim scaling even when lat/lon are given")
+    parser.add_argument("--sensitivity", action="store_true", help="Append analytic elasticity columns for each parameter")
+    args = parser.parse_args(argv)
+
+    from src.batch import run_batch
+    summary = run_batch(
+        args.scenarios, args.out,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        growth_path=args.growth,
+        species_path=args.species_master,
+        use_climate=not args.no_climate,
+        sensitivity=args.sensitivity,
+    )
+    print(f"\n✅ {summary['scenarios']} scenarios → {summary['rows']} rows in {summary['seconds']:.2f}s → {args.out}")
 
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        batch_main(sys.argv[2:])
+    else:
+        main()
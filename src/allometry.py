@@ -0,0 +1,308 @@
+# src/allometry.py
+import re
+import numpy as np
+import pandas as pd
+
+# Named equations, used when a species' equation_expression is missing or
+# unparseable. D = DBH (cm), H = height (m), rho = wood density (g/cm³); AGB in kg.
+BUILTIN_EQUATIONS = {
+    # Chave et al. (2014), pantropical
+    "pantropical_agb": "AGB = 0.0673*(rho*D^2*H)^0.976",
+    # Chave et al. (2005), dry forest, with / without height
+    "chave2005_dry": "AGB = 0.112*(rho*D^2*H)^0.916",
+    "chave2005_dry_noh": "AGB = rho*exp(-0.667 + 1.784*ln(D) + 0.207*ln(D)^2 - 0.0281*ln(D)^3)",
+    # Chave et al. (2005), moist forest, with / without height
+    "chave2005_moist": "AGB = 0.0509*rho*D^2*H",
+    "chave2005_moist_noh": "AGB = rho*exp(-1.499 + 2.148*ln(D) + 0.207*ln(D)^2 - 0.0281*ln(D)^3)",
+    # Chave et al. (2005), wet forest, with height
+    "chave2005_wet": "AGB = 0.0776*(rho*D^2*H)^0.940",
+}
+DEFAULT_EQUATION = "pantropical_agb"
+
+# Accepted spellings of the three inputs → canonical name
+_VARS = {
+    "rho": "rho", "ρ": "rho", "WD": "rho", "wd": "rho",
+    "D": "D", "DBH": "D", "dbh": "D",
+    "H": "H", "Ht": "H", "height": "H",
+}
+_FUNCS = {"exp": np.exp, "ln": np.log, "log": np.log, "log10": np.log10}
+
+_TOKEN = re.compile(r"\s*(?:(\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?)|(\*\*|[-+*/^()])|([A-Za-zρ_][A-Za-z0-9_]*))")
+
+# ---------- Parsing ----------
+def _tokenize(text: str):
+    tokens, pos = [], 0
+    text = text.strip()
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if not m or m.end() == pos:
+            raise ValueError(f"Unexpected character {text[pos]!r} in allometry {text!r}")
+        num, op, name = m.groups()
+        if num is not None:
+            tokens.append(("num", float(num)))
+        elif op is not None:
+            tokens.append(("op", "^" if op == "**" else op))
+        else:
+            tokens.append(("name", name))
+        pos = m.end()
+    return tokens
+
+class _Parser:
+    """
+    Recursive-descent parser for + - * / ^ (or **), parentheses, numbers,
+    the variables rho/D/H and the functions exp/ln/log/log10. Produces a
+    tuple AST; nothing is ever passed to Python eval.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.i = 0
+
+    def _peek(self):
+        return self.tokens[self.i] if self.i < len(self.tokens) else (None, None)
+
+    def _take(self, kind=None, value=None):
+        tok = self._peek()
+        if tok[0] is None or (kind and tok[0] != kind) or (value and tok[1] != value):
+            raise ValueError(f"Cannot parse allometry {self.text!r} near token {self.i}")
+        self.i += 1
+        return tok
+
+    def parse(self):
+        node = self._sum()
+        if self.i != len(self.tokens):
+            raise ValueError(f"Trailing tokens in allometry {self.text!r}")
+        return node
+
+    def _sum(self):
+        terms = [self._product()]
+        while self._peek() in (("op", "+"), ("op", "-")):
+            op = self._take()[1]
+            term = self._product()
+            terms.append(term if op == "+" else ("neg", term))
+        return terms[0] if len(terms) == 1 else ("add", terms)
+
+    def _product(self):
+        factors = [self._unary()]
+        while self._peek() in (("op", "*"), ("op", "/")):
+            op = self._take()[1]
+            f = self._unary()
+            factors.append(f if op == "*" else ("pow", f, ("num", -1.0)))
+        return factors[0] if len(factors) == 1 else ("mul", factors)
+
+    def _unary(self):
+        if self._peek() == ("op", "-"):
+            self._take()
+            return ("neg", self._unary())
+        if self._peek() == ("op", "+"):
+            self._take()
+        return self._power()
+
+    def _power(self):
+        base = self._atom()
+        if self._peek() == ("op", "^"):
+            self._take()
+            return ("pow", base, self._unary())
+        return base
+
+    def _atom(self):
+        kind, value = self._peek()
+        if kind == "num":
+            self._take()
+            return ("num", value)
+        if (kind, value) == ("op", "("):
+            self._take()
+            node = self._sum()
+            self._take("op", ")")
+            return node
+        if kind == "name":
+            self._take()
+            if value in _FUNCS:
+                self._take("op", "(")
+                arg = self._sum()
+                self._take("op", ")")
+                return ("call", value, arg)
+            if value in _VARS:
+                return ("var", _VARS[value])
+            raise ValueError(f"Unknown name {value!r} in allometry {self.text!r}")
+        raise ValueError(f"Cannot parse allometry {self.text!r} near token {self.i}")
+
+def parse_expression(expression: str):
+    """Parse 'AGB = <expr>' (the 'AGB =' prefix is optional) into a tuple AST."""
+    rhs = expression.split("=", 1)[1] if "=" in expression else expression
+    return _Parser(rhs).parse()
+
+# ---------- Compilation ----------
+def _compile(node):
+    kind = node[0]
+    if kind == "num":
+        v = node[1]
+        return lambda env: v
+    if kind == "var":
+        name = node[1]
+        return lambda env: env[name]
+    if kind == "neg":
+        f = _compile(node[1])
+        return lambda env: -f(env)
+    if kind == "add":
+        fs = [_compile(n) for n in node[1]]
+        return lambda env: sum(f(env) for f in fs)
+    if kind == "mul":
+        fs = [_compile(n) for n in node[1]]
+        def mul(env):
+            out = fs[0](env)
+            for f in fs[1:]:
+                out = out * f(env)
+            return out
+        return mul
+    if kind == "pow":
+        b, e = _compile(node[1]), _compile(node[2])
+        return lambda env: np.power(b(env), e(env))
+    if kind == "call":
+        fn, arg = _FUNCS[node[1]], _compile(node[2])
+        if fn is np.exp:
+            return lambda env: fn(arg(env))
+        def log(env):
+            # logs of non-positive inputs (e.g. D = 0 at planting) → NaN, zeroed below
+            x = arg(env)
+            return fn(np.where(x > 0, x, np.nan))
+        return log
+    raise ValueError(f"Unsupported node {kind!r}")
+
+def _has_var(node, name=None) -> bool:
+    if node[0] == "var":
+        return name is None or node[1] == name
+    if node[0] in ("num",):
+        return False
+    children = node[1] if node[0] in ("add", "mul") else [node[2]] if node[0] == "call" else node[1:]
+    return any(_has_var(c, name) for c in children)
+
+def _const(node) -> float:
+    if _has_var(node):
+        raise ValueError("not a constant")
+    return float(_compile(node)({}))
+
+def _elasticity(node, var="rho") -> float:
+    """d ln f / d ln var, when it is a constant (power-law dependence on var)."""
+    if not _has_var(node, var):
+        return 0.0
+    kind = node[0]
+    if kind == "var":
+        return 1.0
+    if kind == "mul":
+        return sum(_elasticity(c, var) for c in node[1])
+    if kind == "neg":
+        return _elasticity(node[1], var)
+    if kind == "pow":
+        return _const(node[2]) * _elasticity(node[1], var)
+    if kind == "call" and node[1] == "exp":
+        return _log_slope(node[2], var)
+    raise ValueError(f"{var} enters the equation non-multiplicatively")
+
+def _log_slope(node, var) -> float:
+    """d g / d ln var for the argument g of exp(), when constant."""
+    if not _has_var(node, var):
+        return 0.0
+    kind = node[0]
+    if kind == "add":
+        return sum(_log_slope(c, var) for c in node[1])
+    if kind == "neg":
+        return -_log_slope(node[1], var)
+    if kind == "mul":
+        dep = [c for c in node[1] if _has_var(c, var)]
+        if len(dep) != 1:
+            raise ValueError(f"{var} appears in more than one factor inside exp()")
+        scale = 1.0
+        for c in node[1]:
+            if c is not dep[0]:
+                scale *= _const(c)
+        return scale * _log_slope(dep[0], var)
+    if kind == "call" and node[1] in ("ln", "log"):
+        return _elasticity(node[2], var)
+    if kind == "call" and node[1] == "log10":
+        return _elasticity(node[2], var) / np.log(10.0)
+    raise ValueError(f"{var} enters exp() non-logarithmically")
+
+def compile_equation(expression: str) -> dict:
+    """
+    Compile an allometry expression once into a vectorized kernel.
+
+    Returns {"expression", "agb", "rho_elasticity"} where agb(D, H, rho) maps
+    arrays (cm, m, g/cm³) to AGB in kg — non-finite results (e.g. log of a zero
+    diameter) become 0 — and rho_elasticity is d ln AGB / d ln rho (NaN when it
+    is not a constant, i.e. rho does not enter as a power-law factor).
+    """
+    tree = parse_expression(expression)
+    fn = _compile(tree)
+    try:
+        rho_el = _elasticity(tree, "rho")
+    except ValueError:
+        rho_el = float("nan")   # no closed form; sensitivity reports NaN
+
+    def agb(D, H, rho):
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            out = fn({"D": np.asarray(D, dtype=float), "H": np.asarray(H, dtype=float),
+                      "rho": np.asarray(rho, dtype=float)})
+        out = np.broadcast_to(np.asarray(out, dtype=float), np.broadcast(D, H, rho).shape)
+        return np.where(np.isfinite(out), out, 0.0)
+
+    return {"expression": expression, "agb": agb, "rho_elasticity": rho_el}
+
+# ---------- Registry ----------
+def build_registry(df_species: pd.DataFrame, extra: dict | None = None) -> dict:
+    """
+    Map every species in the master to a compiled allometry.
+
+    Resolution order per species: its equation_expression (if it parses), then
+    its equation_type looked up in BUILTIN_EQUATIONS (+ `extra` name → expression),
+    then DEFAULT_EQUATION. Each distinct equation is compiled once.
+
+    Returns {"species": {species: key}, "equations": {key: compiled}} where key is
+    the parsed form of the expression, so species whose equations differ only in
+    spacing, ** vs ^ or the 'AGB =' prefix share a group.
+    """
+    named = {**BUILTIN_EQUATIONS, **(extra or {})}
+    equations = {}
+
+    def _get(expr):
+        key = repr(parse_expression(expr))
+        if key not in equations:
+            equations[key] = compile_equation(expr)
+        return key
+
+    default_key = _get(named[DEFAULT_EQUATION])
+    mapping = {}
+    for _, row in df_species.drop_duplicates(subset="species", keep="first").iterrows():
+        key = None
+        expr = row.get("equation_expression")
+        if isinstance(expr, str) and expr.strip():
+            try:
+                key = _get(expr.strip())
+            except ValueError as e:
+                print(f"[ALLOMETRY] {row['species']}: {e}; falling back")
+        if key is None:
+            eq_type = row.get("equation_type")
+            if isinstance(eq_type, str) and eq_type in named:
+                key = _get(named[eq_type])
+        mapping[row["species"]] = key or default_key
+
+    return {"species": mapping, "equations": equations, "default": default_key}
+
+def equation_for(registry: dict, species: str) -> dict:
+    """Compiled allometry for one species (default equation if unknown)."""
+    return registry["equations"][registry["species"].get(species, registry["default"])]
+
+def evaluate_agb(registry: dict, species, D, H, rho) -> np.ndarray:
+    """
+    AGB (kg) for parallel row arrays (species, D, H, rho). Rows are grouped by
+    equation and each group is evaluated in a single kernel call.
+    """
+    D, H, rho = (np.asarray(a, dtype=float) for a in (D, H, rho))
+    keys = pd.Series(species).map(registry["species"]).fillna(registry["default"]).to_numpy()
+
+    out = np.zeros(len(keys))
+    for key in pd.unique(keys):
+        m = keys == key
+        out[m] = registry["equations"][key]["agb"](D[m], H[m], rho[m])
+    return out
@@ -0,0 +1,254 @@
+# src/batch.py
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from .data_loader import load_growth_curves, load_species_master
+from .tables import build_species_tables
+from .sensitivity import PARAMS, elasticities
+
+# Output schema (same columns as data/sim_results_v2.csv)
+SIM_COLUMNS = [
+    "city", "lat", "lon", "species", "common_name", "age_years", "scenario",
+    "trees_planted", "trees_alive", "agb_kg", "bgb_kg", "carbon_t", "co2_t",
+    "co2_total_t", "co2_cumulative_t",
+]
+
+# Extra columns written with --sensitivity (analytic d ln co2_cumulative_t / d ln p)
+ELASTICITY_COLUMNS = [f"elasticity_{p}" for p in PARAMS]
+
+# Accepted aliases in the scenario file → canonical name
+SCENARIO_ALIASES = {
+    "site": "city",
+    "species_scientific": "species",
+    "trees_planted": "trees",
+    "scenario": "survival",
+    "annual_survival_rate": "survival",
+}
+
+# Per-worker state, filled once by _init_worker
+_TABLES = None
+_USE_CLIMATE = True
+_SENSITIVITY = False
+
+def load_scenarios(path: str) -> pd.DataFrame:
+    """
+    Read a scenario file (CSV or Parquet) with one row per
+    (site, species, years, trees[, survival]) run. lat/lon are optional.
+
+    Rows with a blank species or a blank/non-numeric years or trees are
+    dropped; their 1-based data-row numbers are kept in df.attrs["dropped_rows"].
+    """
+    if str(path).lower().endswith((".parquet", ".pq")):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+
+    df = df.rename(columns={k: v for k, v in SCENARIO_ALIASES.items()
+                            if k in df.columns and v not in df.columns})
+    missing = {"species", "years", "trees"} - set(df.columns)
+    if missing:
+        raise ValueError(f"Scenario file missing columns: {missing} in {path}")
+
+    for col in ("city", "lat", "lon", "survival"):
+        if col not in df.columns:
+            df[col] = None
+
+    df = df[["city", "lat", "lon", "species", "years", "trees", "survival"]].copy()
+    for col in ("lat", "lon", "years", "trees", "survival"):
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    for col in ("species", "city"):
+        df[col] = df[col].astype(object).where(df[col].notna(), None)
+        df[col] = df[col].map(lambda v: None if v is None or not str(v).strip() else str(v).strip())
+
+    valid = df["species"].notna() & df["years"].notna() & df["trees"].notna()
+    dropped = [int(i) + 1 for i in df.index[~valid]]
+    df = df[valid].reset_index(drop=True)
+    df.attrs["dropped_rows"] = dropped
+    return df
+
+def _init_worker(growth_path=None, species_path=None, use_climate=True, sensitivity=False):
+    """Load both datasets once per worker process and precompute species arrays."""
+    global _TABLES, _USE_CLIMATE, _SENSITIVITY
+    _TABLES = build_species_tables(load_growth_curves(growth_path), load_species_master(species_path))
+    _USE_CLIMATE = use_climate
+    _SENSITIVITY = sensitivity
+
+def _columns():
+    return SIM_COLUMNS + ELASTICITY_COLUMNS if _SENSITIVITY else SIM_COLUMNS
+
+@lru_cache(maxsize=4096)
+def _site_multiplier(lat: float, lon: float) -> float:
+    from .climate import climate_at_latlon, climate_multiplier_from_mat_map
+    mat_c, map_mm = climate_at_latlon(lat, lon)
+    mult, _ = climate_multiplier_from_mat_map(mat_c, map_mm)
+    return mult
+
+def _is_missing(v) -> bool:
+    return v is None or (isinstance(v, float) and np.isnan(v))
+
+def _run_chunk(records):
+    """
+    Evaluate a list of scenario dicts against the worker's species tables.
+    Returns (DataFrame in SIM_COLUMNS order, [skipped species names]).
+    """
+    cols = {c: [] for c in _columns()}
+    skipped = []
+    for rec in records:
+        t = _TABLES.get(rec["species"])
+        if t is None:
+            skipped.append(rec["species"])
+            continue
+
+        years = int(rec["years"])
+        trees = int(rec["trees"])
+        surv = t["survival"] if _is_missing(rec["survival"]) else float(rec["survival"])
+        lat, lon = rec["lat"], rec["lon"]
+
+        mult = 1.0
+        if _USE_CLIMATE and not (_is_missing(lat) or _is_missing(lon)):
+            mult = _site_multiplier(float(lat), float(lon))
+
+        n = int(np.searchsorted(t["ages"], years, side="right"))
+        ages = t["ages"][:n]
+        alive = trees * surv ** ages
+        co2_t = t["co2_kg"][:n] / 1000.0              # per tree
+        co2_total_t = co2_t * alive * mult            # plantation that year
+
+        for c, v in (("city", rec["city"]), ("lat", lat), ("lon", lon), ("species", rec["species"]),
+                     ("common_name", t["common_name"]), ("scenario", surv), ("trees_planted", trees)):
+            cols[c].append(np.full(n, v, dtype=object))
+        cols["age_years"].append(ages)
+        cols["trees_alive"].append(alive)
+        cols["agb_kg"].append(t["agb_kg"][:n])
+        cols["bgb_kg"].append(t["bgb_kg"][:n])
+        cols["carbon_t"].append((t["agb_kg"][:n] + t["bgb_kg"][:n]) * t["CF"] / 1000.0)
+        cols["co2_t"].append(co2_t)
+        cols["co2_total_t"].append(co2_total_t)
+        cols["co2_cumulative_t"].append(np.cumsum(co2_total_t))
+        if _SENSITIVITY:
+            el = elasticities(co2_total_t, ages, t["R"], t["rho_elasticity"])
+            for p in PARAMS:
+                cols[f"elasticity_{p}"].append(el[p])
+
+    if not cols["age_years"]:
+        return pd.DataFrame(columns=_columns()), skipped
+
+    out = pd.DataFrame({c: np.concatenate(v) for c, v in cols.items()}).infer_objects()
+    out["trees_alive"] = out["trees_alive"].round(2)
+    floats = ["agb_kg", "bgb_kg", "carbon_t", "co2_t", "co2_total_t", "co2_cumulative_t"]
+    out[floats] = out[floats].round(6)
+    if _SENSITIVITY:
+        out[ELASTICITY_COLUMNS] = out[ELASTICITY_COLUMNS].round(6)
+    return out, skipped
+
+# Fixed Parquet column types, so every chunk (even one with all-blank cities) shares one schema
+_STRING_COLUMNS = {"city", "species", "common_name"}
+_INT_COLUMNS = {"age_years", "trees_planted"}
+
+def _parquet_schema(columns):
+    import pyarrow as pa
+    return pa.schema([
+        (c, pa.string() if c in _STRING_COLUMNS else pa.int64() if c in _INT_COLUMNS else pa.float64())
+        for c in columns
+    ])
+
+class _ResultWriter:
+    """Append result chunks to a CSV or Parquet file as they arrive."""
+
+    def __init__(self, path: str, columns=SIM_COLUMNS):
+        self.path = path
+        self.columns = columns
+        self.parquet = str(path).lower().endswith((".parquet", ".pq"))
+        self._writer = None
+        self._header = True
+        if self.parquet:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError as e:
+                raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow).") from e
+            self.schema = _parquet_schema(columns)
+
+    def write(self, df: pd.DataFrame):
+        if df.empty:
+            return
+        if self.parquet:
+            import pyarrow as pa
+            table = pa.Table.from_pandas(df[self.columns], schema=self.schema, preserve_index=False)
+            self._parquet_writer().write_table(table)
+        else:
+            df.to_csv(self.path, mode="w" if self._header else "a", header=self._header, index=False)
+            self._header = False
+
+    def _parquet_writer(self):
+        if self._writer is None:
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(self.path, self.schema)
+        return self._writer
+
+    def close(self):
+        if self.parquet:
+            # no chunks written → still leave an empty file with the full schema
+            self._parquet_writer().close()
+        elif self._header:
+            pd.DataFrame(columns=self.columns).to_csv(self.path, index=False)
+
+def run_batch(scenario_path: str, out_path: str, workers: int | None = None, chunk_size: int = 200,
+              growth_path: str | None = None, species_path: str | None = None,
+              use_climate: bool = True, sensitivity: bool = False, progress=print) -> dict:
+    """
+    Evaluate every scenario in `scenario_path` and stream results to `out_path`
+    (.csv or .parquet). Chunks are spread over a process pool whose workers load
+    the datasets once; results are written in input order as they complete.
+    With `sensitivity`, per-row elasticities (ELASTICITY_COLUMNS) are appended.
+
+    Returns a summary dict: scenarios, rows, skipped, dropped, seconds.
+    """
+    scenarios = load_scenarios(scenario_path)
+    dropped = scenarios.attrs.get("dropped_rows", [])
+    if progress and dropped:
+        shown = ", ".join(map(str, dropped[:20])) + (" …" if len(dropped) > 20 else "")
+        progress(f"[BATCH] dropped {len(dropped)} row(s) with blank/invalid species, years or trees: {shown}")
+    records = scenarios.to_dict("records")
+    chunks = [records[i:i + chunk_size] for i in range(0, len(records), chunk_size)]
+    total = len(records)
+    workers = (os.cpu_count() or 1) if workers is None else workers
+
+    init_args = (growth_path, species_path, use_climate, sensitivity)
+    writer = _ResultWriter(out_path, SIM_COLUMNS + ELASTICITY_COLUMNS if sensitivity else SIM_COLUMNS)
+    done = rows = 0
+    skipped = set()
+    t0 = time.perf_counter()
+
+    if workers <= 1:
+        _init_worker(*init_args)
+        results = map(_run_chunk, chunks)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args)
+        results = pool.map(_run_chunk, chunks)
+
+    try:
+        for chunk, (df, missing) in zip(chunks, results):
+            writer.write(df)
+            done += len(chunk)
+            rows += len(df)
+            skipped.update(missing)
+            if progress:
+                elapsed = time.perf_counter() - t0
+                rate = done / elapsed if elapsed > 0 else float("inf")
+                progress(f"[BATCH] {done}/{total} scenarios • {rows} rows • {rate:,.0f} scenarios/s")
+    finally:
+        writer.close()
+        if pool is not None:
+            pool.shutdown()
+
+    elapsed = time.perf_counter() - t0
+    if progress and skipped:
+        progress(f"[BATCH] skipped unknown species: {', '.join(sorted(skipped))}")
+    return {"scenarios": total, "rows": rows, "skipped": sorted(skipped), "dropped": len(dropped),
+            "seconds": elapsed}
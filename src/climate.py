@@ -10,6 +10,26 @@ WC_PATH_BIO12 = os.path.join("data", "worldclim", "bio", "wc2.1_10m_bio_12.tif")
 
 _bio1_ds = None
 _bio12_ds = None
+_grids = None  # in-memory/memory-mapped grids (see use_grids); bypass rasterio when set
+
+def use_grids(grids):
+    """
+    Sample from preloaded grids instead of opening the rasters, e.g. the
+    read-only memory maps from src.shared.share_climate_grids. Pass None to
+    go back to rasterio.
+    """
+    global _grids
+    _grids = grids
+
+def _sample_grid(grid, lon: float, lat: float):
+    """Nearest-pixel value at (lon, lat) from a north-up grid, or None outside it."""
+    a, b, c, d, e, f = grid["transform"]
+    col = int(math.floor((lon - c) / a))
+    row = int(math.floor((lat - f) / e))
+    data = grid["data"]
+    if not (0 <= row < data.shape[0] and 0 <= col < data.shape[1]):
+        return None
+    return data[row, col]
 
 def _open_once():
     """
@@ -65,6 +85,17 @@ def climate_at_latlon(lat: float, lon: float):
 
     If rasters are missing or the sample is invalid, returns (None, None).
     """
+    if _grids is not None:
+        v1 = _sample_grid(_grids["bio1"], float(lon), float(lat))
+        v12 = _sample_grid(_grids["bio12"], float(lon), float(lat))
+        if v1 is None or v12 is None:
+            return None, None
+        if not _is_valid_sample(v1, _grids["bio1"]["nodata"]):
+            return None, None
+        if not _is_valid_sample(v12, _grids["bio12"]["nodata"]):
+            return None, None
+        return float(v1) / 10.0, float(v12)
+
     _open_once()
     if _bio1_ds is None or _bio12_ds is None:
         return None, None
@@ -95,6 +126,33 @@ def climate_at_latlon(lat: float, lon: float):
 
     return mat_c, map_mm
 
+# ---- Climate response curve (documented, not dummy) ----
+def climate_multiplier_from_mat_map(mat_c, map_mm):
+    """
+    mat_c: mean annual temperature in °C
+    map_mm: mean annual precipitation in mm
+    Returns a scalar multiplier ~[0.5, 1.6]
+    """
+    if mat_c is None or map_mm is None:
+        return 1.0, {"mat_c": None, "map_mm": None, "temp_factor": None, "rain_factor": None, "multiplier": 1.0}
+
+    # Temperature bell curve centered ~25C with wide tolerance
+    temp_factor = math.exp(-((mat_c - 25.0) / 12.0) ** 2)
+
+    # Rainfall saturating response; approaches ~1.2 in very wet climates
+    rain_factor = (1.0 - math.exp(-map_mm / 900.0)) * 1.2
+
+    mult = max(0.5, min(1.6, temp_factor * rain_factor))
+
+    dbg = {
+        "mat_c": round(mat_c, 2),
+        "map_mm": round(map_mm, 0),
+        "temp_factor": round(temp_factor, 3),
+        "rain_factor": round(rain_factor, 3),
+        "multiplier": round(mult, 3),
+    }
+    return mult, dbg
+
 def close_datasets():
     """
     Optional: close datasets if you need to reload or during shutdown.
@@ -1,8 +1,12 @@
 # src/config.py
+import os
 from pathlib import Path
 
 DATA_DIR = Path(__file__).resolve().parents[1] / "data"
 
+# Max points per series in interactive (Plotly) charts; longer series are downsampled
+PLOT_MAX_POINTS = int(os.environ.get("PLOT_MAX_POINTS", "200"))
+
 def pick_csv(base_name: str, vtag: str = "v2") -> str:
     """
     Return the path to the preferred CSV (…_v2.csv if present, else … .csv).
@@ -0,0 +1,96 @@
+# src/figure_spec.py
+import base64
+import numpy as np
+
+from .config import PLOT_MAX_POINTS
+
+def typed_array(values, dtype: str | None = None) -> dict:
+    """
+    Encode a numeric series as a Plotly.js typed array spec {dtype, bdata}
+    (base64 of the little-endian buffer). Floats default to f4, integers to
+    the smallest signed type that holds them.
+    """
+    arr = np.asarray(values)
+    if dtype is None:
+        if np.issubdtype(arr.dtype, np.integer):
+            lo, hi = (int(arr.min()), int(arr.max())) if arr.size else (0, 0)
+            dtype = "i1" if -128 <= lo and hi <= 127 else "i2" if -32768 <= lo and hi <= 32767 else "i4"
+        else:
+            dtype = "f4"
+    buf = np.ascontiguousarray(arr, dtype=np.dtype(dtype).newbyteorder("<"))
+    return {"dtype": dtype, "bdata": base64.b64encode(buf.tobytes()).decode("ascii")}
+
+def downsample_index(n: int, max_points: int) -> np.ndarray:
+    """
+    Evenly spaced indices into a series of length n, at most `max_points`
+    long and always keeping the first and last points.
+    """
+    if max_points is None or n <= max_points or max_points < 2:
+        return np.arange(n)
+    return np.unique(np.linspace(0, n - 1, max_points).round().astype(int))
+
+def bin_sums(x, y, max_bins: int):
+    """
+    Sum y over runs of consecutive points so that at most `max_bins` remain
+    (totals are preserved, unlike point sampling). Returns (x_first, x_last, sums)
+    per bin; a series already short enough comes back one point per bin.
+    """
+    x, y = np.asarray(x), np.asarray(y, dtype=float)
+    if max_bins is None or len(x) <= max_bins or max_bins < 1:
+        return x, x, y
+    size = -(-len(x) // max_bins)
+    starts = np.arange(0, len(x), size)
+    ends = np.minimum(starts + size, len(x)) - 1
+    return x[starts], x[ends], np.add.reduceat(y, starts)
+
+def _bars(ages, totals, max_points):
+    first, last, sums = bin_sums(ages, totals, max_points)
+    bar = {"type": "bar", "y": typed_array(sums), "opacity": 0.35}
+    if len(sums) == len(ages):
+        bar.update(x=typed_array(ages), name="Total yearly CO₂ (t)")
+        return bar
+    # one bar per bin, centred on and spanning the years it sums
+    step = ages[1] - ages[0]
+    bar.update(
+        x=typed_array((first + last) / 2.0),
+        width=((last - first) + step).tolist(),
+        name="Total CO₂ per age bin (t)",
+        hovertext=[f"ages {a}–{b}" for a, b in zip(first.tolist(), last.tolist())],
+    )
+    return bar
+
+def _series(x, y, max_points):
+    idx = downsample_index(len(x), max_points)
+    return typed_array(np.asarray(x)[idx]), typed_array(np.asarray(y)[idx])
+
+def co2_figure_spec(dfs, max_points: int = PLOT_MAX_POINTS) -> dict:
+    """
+    Plotly figure dict (data + layout) for the dashboard chart, built directly
+    without plotly.graph_objs: stacked yearly bars + cumulative line per species.
+    Numeric series are base64 typed arrays of at most `max_points` points: the
+    cumulative lines are point-sampled, the yearly bars are summed into age bins.
+    """
+    ages = dfs[0]["age_years"].to_numpy()
+    stacked = np.sum([df["CO2_tons"].to_numpy() for df in dfs], axis=0)
+
+    data = [_bars(ages, stacked, max_points)]
+
+    for df in dfs:
+        x, y = _series(df["age_years"].to_numpy(), df["CO2_cumulative_tons"].to_numpy(), max_points)
+        data.append({
+            "type": "scatter",
+            "mode": "lines+markers",
+            "x": x,
+            "y": y,
+            "name": f"{df['species'].iloc[0]} (cum)",
+        })
+
+    layout = {
+        "title": {"text": "Interactive CO₂ Sequestration"},
+        "xaxis": {"title": {"text": "Age (years)"}, "gridcolor": "white"},
+        "yaxis": {"title": {"text": "CO₂ (tons)"}, "gridcolor": "white"},
+        "plot_bgcolor": "#E5ECF6",
+        "hovermode": "x unified",
+        "legend": {"orientation": "h"},
+    }
+    return {"data": data, "layout": layout}
@@ -0,0 +1,70 @@
+# src/inverse.py
+import numpy as np
+
+from .tables import stack_species_tables
+
+def build_inverse_index(tables: dict) -> dict:
+    """
+    Stack the per-species tables (see src.tables.stack_species_tables) and add
+    cum_t[i, a]: the cumulative CO₂ (t) credited to ONE planted tree of species
+    i after `a` years, with that species' default survival — the same quantity
+    compute_curve reports as CO2_cumulative_tons for trees=1.
+    Ages past a species' last growth record carry its final value forward.
+    """
+    index = stack_species_tables(tables)
+    index["cum_t"] = _cumulative(index["yearly_t"], index["survival"], index["ages"])
+    return index
+
+def _cumulative(yearly_t, survival, ages):
+    return np.cumsum(yearly_t * survival[:, None] ** ages[None, :], axis=1)
+
+def _cum_for(index, survival):
+    if survival is None:
+        return index["cum_t"]
+    surv = np.full(len(index["species"]), float(survival))
+    return _cumulative(index["yearly_t"], surv, index["ages"])
+
+def trees_needed(index: dict, target_t: float, years: int, multiplier: float = 1.0,
+                 survival: float | None = None) -> dict:
+    """
+    Trees of each species needed to reach `target_t` tonnes of cumulative CO₂
+    after `years`. Closed form: cumulative CO₂ is linear in trees planted.
+    Returns parallel arrays ranked by fewest trees; species that sequester
+    nothing by then get trees_needed = NaN and sort last.
+    """
+    cum = _cum_for(index, survival)
+    col = int(np.clip(years, 0, len(index["ages"]) - 1))
+    per_tree = cum[:, col] * multiplier
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        need = np.where(per_tree > 0, np.ceil(target_t / per_tree), np.nan)
+
+    order = np.argsort(need, kind="stable")   # NaN sorts last
+    return {
+        "species": index["species"][order],
+        "trees_needed": need[order],
+        "co2_per_tree_t": per_tree[order],
+    }
+
+def years_needed(index: dict, target_t: float, trees: int, multiplier: float = 1.0,
+                 survival: float | None = None) -> dict:
+    """
+    First age at which `trees` trees of each species reach `target_t` tonnes of
+    cumulative CO₂. Each row of the cumulative matrix is non-decreasing, so the
+    count of ages still below target equals a left searchsorted, done for all
+    species in one pass. Unreachable targets (within the growth data) get NaN.
+    Returns parallel arrays ranked by fewest years, ties by larger horizon CO₂.
+    """
+    cum = _cum_for(index, survival) * (trees * multiplier)
+    idx = (cum < target_t).sum(axis=1)
+    reached = idx <= index["last_age"]
+    yrs = np.where(reached, index["ages"][np.minimum(idx, len(index["ages"]) - 1)], np.nan)
+
+    horizon = cum[np.arange(len(idx)), index["last_age"]]
+
+    order = np.lexsort((-horizon, yrs))       # NaN sorts last
+    return {
+        "species": index["species"][order],
+        "years_needed": yrs[order],
+        "co2_at_horizon_t": horizon[order],
+    }
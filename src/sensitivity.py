@@ -0,0 +1,114 @@
+# src/sensitivity.py
+import numpy as np
+
+# Parameter keys, in display order
+PARAMS = ("wood_density", "carbon_fraction", "root_to_shoot", "survival", "climate_multiplier")
+
+PARAM_LABELS = {
+    "wood_density": "Wood density ρ",
+    "carbon_fraction": "Carbon fraction CF",
+    "root_to_shoot": "Root:shoot R",
+    "survival": "Annual survival",
+    "climate_multiplier": "Climate multiplier",
+}
+
+def elasticities(weights, ages, R, rho_elasticity) -> dict:
+    """
+    Analytic elasticities (d ln S / d ln p) of cumulative CO₂ S_a = Σ_{t≤a} w_t.
+
+    weights: CO₂ contributed each year, shape (..., A) — already including
+             survival^t, trees and climate multiplier (any constant factor cancels).
+    ages:    age of each column, shape (A,)
+    R, rho_elasticity: per-row parameters broadcastable to weights[..., 0].
+
+    Every term of S is proportional to CF, (1 + R), ρ^b and the climate
+    multiplier, and year t carries survival^t, so:
+        ρ → b,  CF → 1,  R → R / (1 + R),  multiplier → 1,
+        survival → Σ t·w_t / Σ w_t.
+    Returns {param: array shaped like weights}; NaN where S = 0.
+    """
+    weights = np.asarray(weights, dtype=float)
+    cum = np.cumsum(weights, axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        surv = np.cumsum(weights * ages, axis=-1) / cum
+    defined = np.where(cum > 0, 1.0, np.nan)
+
+    R = np.asarray(R, dtype=float)[..., None]
+    rho_el = np.asarray(rho_elasticity, dtype=float)[..., None]
+    return {
+        "wood_density": rho_el * defined,
+        "carbon_fraction": defined * 1.0,
+        "root_to_shoot": (R / (1.0 + R)) * defined,
+        "survival": surv * defined,
+        "climate_multiplier": defined * 1.0,
+    }
+
+def tornado(index: dict, years: int, trees: int = 1, multiplier: float = 1.0,
+            delta: float = 0.10, rows=None) -> dict:
+    """
+    One-at-a-time ranges of cumulative CO₂ (t) when each parameter moves ±delta
+    (relative), for the species rows of a stacked index (src.tables.stack_species_tables)
+    and all ages ≤ years. Survival is capped at 1.
+
+    Returns {"species", "ages", "base": (S, A), param: {"low": (S, A), "high": (S, A)}}.
+    All ranges are closed-form rescalings of the base curve except survival,
+    which re-weights the yearly terms (one extra array pass per bound).
+    """
+    rows = np.arange(len(index["species"])) if rows is None else np.asarray(rows)
+    n_ages = int(np.clip(years, 0, len(index["ages"]) - 1)) + 1
+    ages = index["ages"][:n_ages]
+    yearly = index["yearly_t"][rows, :n_ages] * (trees * multiplier)
+    surv = index["survival"][rows][:, None]
+    R = index["R"][rows][:, None]
+    b = index["rho_elasticity"][rows][:, None]
+
+    base = np.cumsum(yearly * surv ** ages, axis=1)
+    out = {"species": index["species"][rows], "ages": ages, "base": base}
+
+    for sign, key in ((-1.0, "low"), (1.0, "high")):
+        f = 1.0 + sign * delta
+        surv_f = np.minimum(surv * f, 1.0)
+        ranges = {
+            "wood_density": base * f ** b,
+            "carbon_fraction": base * f,
+            "root_to_shoot": base * (1.0 + R * f) / (1.0 + R),
+            "survival": np.cumsum(yearly * surv_f ** ages, axis=1),
+            "climate_multiplier": base * f,
+        }
+        for p in PARAMS:
+            out.setdefault(p, {})[key] = ranges[p]
+    return out
+
+def sensitivity_summary(index: dict, species_list, years: int, trees: int,
+                        multiplier: float = 1.0, delta: float = 0.10) -> list:
+    """
+    Per selected species at the horizon year: elasticity and ±delta range of
+    cumulative CO₂ for every parameter, rows sorted by swing (widest first).
+    """
+    pos = {sp: i for i, sp in enumerate(index["species"])}
+    rows = [pos[sp] for sp in species_list if sp in pos]
+    if not rows:
+        return []
+
+    tor = tornado(index, years, trees, multiplier, delta, rows)
+    ages = tor["ages"]
+    surv = index["survival"][rows][:, None]
+    weights = index["yearly_t"][rows, :len(ages)] * surv ** ages
+    el = elasticities(weights, ages, index["R"][rows], index["rho_elasticity"][rows])
+
+    summary = []
+    for j, sp in enumerate(tor["species"]):
+        params = []
+        for p in PARAMS:
+            low, high = tor[p]["low"][j, -1], tor[p]["high"][j, -1]
+            params.append({
+                "param": p,
+                "label": PARAM_LABELS[p],
+                "elasticity": float(el[p][j, -1]),
+                "low_t": float(low),
+                "high_t": float(high),
+                "swing_t": float(abs(high - low)),
+            })
+        params.sort(key=lambda d: d["swing_t"], reverse=True)
+        summary.append({"species": sp, "base_t": float(tor["base"][j, -1]), "params": params})
+    return summary
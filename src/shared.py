@@ -0,0 +1,126 @@
+# src/shared.py
+import os
+import stat
+import json
+import atexit
+import shutil
+import tempfile
+import numpy as np
+
+def _base_dir() -> str:
+    # /dev/shm keeps the arrays in RAM (page cache shared by all processes)
+    if os.environ.get("AFFOREST_SHARED_DIR"):
+        return os.environ["AFFOREST_SHARED_DIR"]
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+def enabled() -> bool:
+    """Shared-memory mode is opt-in: AFFOREST_SHARED=1 (set by gunicorn.conf.py)."""
+    return os.environ.get("AFFOREST_SHARED", "").strip().lower() in ("1", "true", "yes", "on")
+
+def create_dir(base: str | None = None) -> str:
+    """
+    Create a fresh directory (mode 0700) for this instance's shared arrays under
+    `base` (default: AFFOREST_SHARED_DIR, else /dev/shm). Every master gets its
+    own, so two deployments or overlapping restarts never touch each other's
+    files. It is removed when the creating process exits.
+    """
+    directory = tempfile.mkdtemp(prefix=f"afforestation_model-{os.getpid()}-", dir=base or _base_dir())
+    _check_private(directory)
+    atexit.register(remove_dir, directory, os.getpid())
+    return directory
+
+def remove_dir(directory: str, owner_pid: int | None = None) -> None:
+    """Delete a directory made by create_dir; forked workers (other pids) leave it alone."""
+    if owner_pid is None or os.getpid() == owner_pid:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def _check_private(directory: str) -> None:
+    """Refuse a directory another user owns or could write to (it would feed every worker)."""
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise RuntimeError(f"Refusing shared directory {directory!r}: "
+                           f"must be a mode 0700 directory owned by uid {os.getuid()}")
+
+def _save(directory: str, name: str, arr) -> None:
+    # write-then-rename so a reader never maps a half-written file
+    path = os.path.join(directory, f"{name}.npy")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, np.ascontiguousarray(arr))
+    os.replace(tmp, path)
+
+def _load(directory: str, name: str):
+    return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+
+def _write_manifest(directory: str, name: str, meta: dict) -> None:
+    path = os.path.join(directory, f"{name}.json")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp, path)
+
+def _read_manifest(directory: str, name: str):
+    path = os.path.join(directory, f"{name}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+# ---------- Species index (src.tables.stack_species_tables / src.inverse) ----------
+def share_index(index: dict, directory: str) -> dict:
+    """
+    Write the numeric arrays of a stacked species index to `directory` (see
+    create_dir) and return a copy whose arrays are read-only memory maps of
+    those files. Call in the gunicorn master (preload) so workers inherit the mappings.
+    """
+    _check_private(directory)
+    arrays = sorted(k for k, v in index.items() if isinstance(v, np.ndarray) and v.dtype != object)
+    for k in arrays:
+        _save(directory, f"index_{k}", index[k])
+    _write_manifest(directory, "index", {"arrays": arrays, "species": [str(s) for s in index["species"]]})
+    return attach_index(directory)
+
+def attach_index(directory: str):
+    """Read-only, zero-copy view of an index written by share_index (None if absent)."""
+    meta = _read_manifest(directory, "index")
+    if meta is None:
+        return None
+    index = {k: _load(directory, f"index_{k}") for k in meta["arrays"]}
+    index["species"] = np.array(meta["species"], dtype=object)
+    return index
+
+# ---------- Climate grids (WorldClim BIO1 / BIO12) ----------
+def share_climate_grids(directory: str):
+    """
+    Read both WorldClim rasters fully into `directory` (see create_dir) and
+    return the attached grids, or None when the rasters are unavailable.
+    """
+    from .climate import WC_PATH_BIO1, WC_PATH_BIO12
+
+    if not (os.path.exists(WC_PATH_BIO1) and os.path.exists(WC_PATH_BIO12)):
+        return None
+
+    import rasterio
+
+    _check_private(directory)
+    meta = {}
+    for name, p in (("bio1", WC_PATH_BIO1), ("bio12", WC_PATH_BIO12)):
+        with rasterio.open(p) as ds:
+            if ds.transform.b != 0 or ds.transform.d != 0:
+                return None   # rotated grid; keep sampling through rasterio
+            _save(directory, f"climate_{name}", ds.read(1))
+            t = ds.transform
+            meta[name] = {"transform": [t.a, t.b, t.c, t.d, t.e, t.f], "nodata": ds.nodata}
+    _write_manifest(directory, "climate", meta)
+
+    return attach_climate_grids(directory)
+
+def attach_climate_grids(directory: str):
+    """Read-only memory-mapped climate grids + georeferencing (None if absent)."""
+    meta = _read_manifest(directory, "climate")
+    if meta is None:
+        return None
+    return {
+        name: {"data": _load(directory, f"climate_{name}"), **meta[name]}
+        for name in ("bio1", "bio12")
+    }
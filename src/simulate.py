@@ -1,10 +1,14 @@
 import matplotlib.pyplot as plt
 from src.data_loader import load_growth_curves, load_species_master
 from src.model import biomass_to_co2
+from src.allometry import build_registry, equation_for
 
-def compare_species(species_list, years, trees):
-    df_growth = load_growth_curves("data/growth_curves_filled.csv")
-    df_species = load_species_master("data/species_master_filled.csv")
+def compare_species(species_list, years, trees, df_growth=None, df_species=None):
+    # Reuse already-loaded datasets when the caller has them
+    if df_growth is None:
+        df_growth = load_growth_curves()
+    if df_species is None:
+        df_species = load_species_master()
 
     if "species_scientific" in df_growth.columns:
         growth_col = "species_scientific"
@@ -18,6 +22,8 @@ def compare_species(species_list, years, trees):
             wood_density_col = col
             break
 
+    registry = build_registry(df_species)
+
     plt.figure(figsize=(8,5))
 
     for species in species_list:
@@ -39,7 +45,8 @@ def compare_species(species_list, years, trees):
         if "Biomass_kg" in species_growth.columns:
             species_growth["CO2_total"] = species_growth["Biomass_kg"].apply(biomass_to_co2) * trees
         elif ("dbh_cm" in species_growth.columns and "height_m" in species_growth.columns and wood_density):
-            species_growth["Biomass_kg"] = 0.0673 * (wood_density * species_growth["dbh_cm"]**2 * species_growth["height_m"])**0.976
+            agb = equation_for(registry, species)["agb"]
+            species_growth["Biomass_kg"] = agb(species_growth["dbh_cm"].values, species_growth["height_m"].values, wood_density)
             species_growth["CO2_total"] = species_growth["Biomass_kg"].apply(biomass_to_co2) * trees
         else:
             print(f"❌ Insufficient data to compute biomass for {species}, skipping...")
@@ -0,0 +1,104 @@
+# src/tables.py
+import numpy as np
+import pandas as pd
+
+from .model import total_biomass_kg, biomass_to_co2
+from .allometry import build_registry, equation_for, evaluate_agb
+
+def parse_survival(value, default: float = 0.95) -> float:
+    """
+    Annual survival from the species master. Older masters store a list of
+    scenarios ("0.80;0.90;0.95"); the first entry is used as the default.
+    """
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return default
+    if isinstance(value, str):
+        value = value.split(";")[0].strip()
+        if not value:
+            return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+def build_species_tables(df_growth: pd.DataFrame, df_species: pd.DataFrame,
+                         registry: dict | None = None) -> dict:
+    """
+    Precompute per-tree numeric arrays for every species present in both datasets.
+
+    Returns {species: {...}} where each entry holds the parameters (rho, CF, R,
+    survival, common_name, rho_elasticity) and age-sorted arrays: ages, dbh_cm,
+    height_m, agb_kg, bgb_kg, co2_kg (all per tree, before survival and climate).
+    AGB comes from the allometry registry (built from the master if not given),
+    evaluated once per equation group over all growth rows.
+    """
+    tables = {}
+    registry = registry or build_registry(df_species)
+    master = df_species.drop_duplicates(subset="species", keep="first").set_index("species")
+    growth = (df_growth[df_growth["species_scientific"].isin(master.index)]
+              .drop_duplicates(subset=["species_scientific", "age_years"], keep="first")
+              .sort_values(["species_scientific", "age_years"]))
+
+    rho_all = growth["species_scientific"].map(master["wood_density_g_cm3"]).fillna(0.6).to_numpy(dtype=float)
+    growth = growth.assign(agb_kg=evaluate_agb(registry, growth["species_scientific"].to_numpy(),
+                                               growth["dbh_cm"].to_numpy(), growth["height_m"].to_numpy(),
+                                               rho_all))
+
+    for species, g in growth.groupby("species_scientific", sort=False):
+        srow = master.loc[species]
+
+        rho  = float(srow.get("wood_density_g_cm3", 0.6))
+        CF   = float(srow.get("carbon_fraction_CF", 0.47))
+        R    = float(srow.get("root_to_shoot_ratio_R", 0.27))
+        surv = parse_survival(srow.get("annual_survival_rate", 0.95))
+
+        dbh = g["dbh_cm"].to_numpy(dtype=float)
+        height = g["height_m"].to_numpy(dtype=float)
+        agb = g["agb_kg"].to_numpy(dtype=float)
+        total = total_biomass_kg(agb, R)
+
+        tables[species] = {
+            "common_name": srow.get("common_name", ""),
+            "rho": rho,
+            "CF": CF,
+            "R": R,
+            "survival": surv,
+            "ages": g["age_years"].to_numpy(dtype=int),
+            "dbh_cm": dbh,
+            "height_m": height,
+            "agb_kg": agb,
+            "bgb_kg": total - agb,
+            "co2_kg": biomass_to_co2(total, CF),
+            "rho_elasticity": equation_for(registry, species)["rho_elasticity"],
+        }
+    return tables
+
+def stack_species_tables(tables: dict) -> dict:
+    """
+    Stack per-species tables into species × age matrices on a common integer
+    age grid 0..max_age. Ages missing for a species contribute zero CO₂.
+
+    yearly_t[i, a] is CO₂ (t) held by one living tree of species i at age a,
+    before survival and climate scaling. Per-species parameters are vectors.
+    """
+    species = sorted(tables)
+    max_age = max(int(tables[s]["ages"].max()) for s in species) if species else 0
+    ages = np.arange(max_age + 1)
+
+    yearly_t = np.zeros((len(species), len(ages)))
+    params = {k: np.empty(len(species)) for k in ("survival", "rho", "CF", "R", "rho_elasticity")}
+    last_age = np.zeros(len(species), dtype=int)
+    for i, sp in enumerate(species):
+        t = tables[sp]
+        yearly_t[i, t["ages"]] = t["co2_kg"] / 1000.0
+        last_age[i] = int(t["ages"].max())
+        for k in params:
+            params[k][i] = t[k]
+
+    return {
+        "species": np.array(species, dtype=object),
+        "ages": ages,
+        "yearly_t": yearly_t,
+        "last_age": last_age,
+        **params,
+    }
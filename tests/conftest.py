@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Make `src` importable when running pytest from any directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
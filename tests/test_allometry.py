@@ -0,0 +1,134 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.allometry import (
+    BUILTIN_EQUATIONS, DEFAULT_EQUATION, build_registry, compile_equation,
+    equation_for, evaluate_agb,
+)
+from src.model import agb_from_chave
+
+D = np.array([0.0, 2.5, 5.0, 20.0, 50.0])
+H = np.array([0.0, 2.0, 4.0, 15.0, 30.0])
+RHO = 0.6
+
+def _value(expr, D=1.0, H=1.0, rho=1.0):
+    return float(compile_equation(expr)["agb"](D, H, rho))
+
+# ---------- Parsing / precedence ----------
+@pytest.mark.parametrize("expr, expected", [
+    ("-2^2", -4.0),
+    ("2^3^2", 512.0),
+    ("2**3", 8.0),
+    ("2*3+4", 10.0),
+    ("2+3*4", 14.0),
+    ("8/2/2", 2.0),
+    ("(2+3)*4", 20.0),
+    ("2^-1", 0.5),
+    ("AGB = 1.5e1", 15.0),
+])
+def test_precedence(expr, expected):
+    assert _value(expr) == pytest.approx(expected)
+
+def test_ln_power_binds_to_call():
+    # ln(D)^2 is (ln D)^2, not ln(D^2)
+    assert _value("ln(D)^2", D=math.e ** 3) == pytest.approx(9.0)
+
+def test_variable_aliases():
+    assert _value("ρ*DBH*Ht", D=2.0, H=3.0, rho=4.0) == pytest.approx(24.0)
+
+@pytest.mark.parametrize("expr", [
+    "AGB = foo(D)",
+    "AGB = 0.1*X",
+    "__import__('os')",
+    "AGB = (D",
+    "AGB = D D",
+])
+def test_rejects_invalid(expr):
+    with pytest.raises(ValueError):
+        compile_equation(expr)
+
+def test_log_of_zero_diameter_is_zero():
+    out = compile_equation("rho*exp(1 + ln(D))")["agb"](D, H, RHO)
+    assert out[0] == 0.0
+    assert np.all(np.isfinite(out))
+
+# ---------- Built-in equations vs closed forms ----------
+def _chave2005_noh(a, b):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lnD = np.log(D)
+        out = RHO * np.exp(a + b * lnD + 0.207 * lnD ** 2 - 0.0281 * lnD ** 3)
+    return np.where(D > 0, out, 0.0)
+
+CLOSED_FORMS = {
+    "pantropical_agb": (lambda: 0.0673 * (RHO * D ** 2 * H) ** 0.976, 0.976),
+    "chave2005_dry": (lambda: 0.112 * (RHO * D ** 2 * H) ** 0.916, 0.916),
+    "chave2005_dry_noh": (lambda: _chave2005_noh(-0.667, 1.784), 1.0),
+    "chave2005_moist": (lambda: 0.0509 * RHO * D ** 2 * H, 1.0),
+    "chave2005_moist_noh": (lambda: _chave2005_noh(-1.499, 2.148), 1.0),
+    "chave2005_wet": (lambda: 0.0776 * (RHO * D ** 2 * H) ** 0.940, 0.940),
+}
+
+def test_every_builtin_has_a_closed_form_check():
+    assert set(CLOSED_FORMS) == set(BUILTIN_EQUATIONS)
+
+@pytest.mark.parametrize("name", sorted(BUILTIN_EQUATIONS))
+def test_builtin_matches_closed_form(name):
+    closed, rho_el = CLOSED_FORMS[name]
+    eq = compile_equation(BUILTIN_EQUATIONS[name])
+    np.testing.assert_allclose(eq["agb"](D, H, RHO), closed(), rtol=1e-12)
+    assert eq["rho_elasticity"] == pytest.approx(rho_el)
+
+def test_pantropical_bit_identical_to_model():
+    eq = compile_equation(BUILTIN_EQUATIONS[DEFAULT_EQUATION])
+    np.testing.assert_array_equal(eq["agb"](D, H, RHO), agb_from_chave(D, H, RHO))
+
+# ---------- ρ-elasticity ----------
+@pytest.mark.parametrize("expr, expected", [
+    ("AGB = exp(-2.977 + ln(rho*D^2*H))", 1.0),
+    ("AGB = exp(-1.8 + 0.976*ln(rho) + 2.673*ln(D) - 0.0299*ln(D)^2)", 0.976),
+    ("AGB = 0.2*D^2.4", 0.0),
+    ("AGB = rho^2/rho", 1.0),
+])
+def test_rho_elasticity(expr, expected):
+    assert compile_equation(expr)["rho_elasticity"] == pytest.approx(expected)
+
+def test_rho_elasticity_nan_when_not_power_law():
+    assert math.isnan(compile_equation("AGB = rho + D")["rho_elasticity"])
+
+# ---------- Registry ----------
+def test_registry_resolution_and_grouped_evaluation():
+    master = pd.DataFrame({
+        "species": ["A", "B", "C", "D"],
+        "equation_type": ["pantropical_agb", "chave2005_dry", "pantropical_agb", "unknown"],
+        "equation_expression": [BUILTIN_EQUATIONS["pantropical_agb"], None, "AGB = 0.2*D^2.4", "AGB = ???"],
+    })
+    reg = build_registry(master)
+    assert equation_for(reg, "B")["expression"] == BUILTIN_EQUATIONS["chave2005_dry"]
+    assert equation_for(reg, "C")["rho_elasticity"] == 0.0
+    assert equation_for(reg, "D")["expression"] == BUILTIN_EQUATIONS[DEFAULT_EQUATION]
+    assert equation_for(reg, "missing")["expression"] == BUILTIN_EQUATIONS[DEFAULT_EQUATION]
+    assert len(reg["equations"]) == 3
+
+    species = np.array(["A", "B", "C", "D", "A"], dtype=object)
+    out = evaluate_agb(reg, species, D, H, np.full(len(D), RHO))
+    expected = [equation_for(reg, s)["agb"](d, h, RHO) for s, d, h in zip(species, D, H)]
+    np.testing.assert_allclose(out, expected, rtol=1e-12)
+
+def test_registry_groups_equivalent_expressions():
+    master = pd.DataFrame({
+        "species": ["A", "B", "C"],
+        "equation_type": [None, None, None],
+        "equation_expression": ["AGB = 0.2*D^2.4", "0.2 * D ** 2.4", "AGB=0.2*D^2.4  "],
+    })
+    reg = build_registry(master)
+    assert len(set(reg["species"].values())) == 1
+    assert len(reg["equations"]) == 2   # + the default equation
+
+def test_evaluate_agb_unknown_species_uses_default():
+    reg = build_registry(pd.DataFrame({"species": ["A"], "equation_type": ["chave2005_dry"]}))
+    out = evaluate_agb(reg, pd.Series(["A", "zzz"]), D[3:], H[3:], np.full(2, RHO))
+    np.testing.assert_allclose(out, [equation_for(reg, "A")["agb"](D[3], H[3], RHO),
+                                     agb_from_chave(D[4], H[4], RHO)], rtol=1e-12)
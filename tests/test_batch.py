@@ -0,0 +1,121 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import batch
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+@pytest.fixture(scope="module")
+def app_module():
+    import app
+    return app
+
+@pytest.fixture
+def worker(monkeypatch):
+    # climate rasters are looked up relative to the project root
+    monkeypatch.chdir(ROOT)
+    batch._init_worker()
+
+def _record(species, years=20, trees=100, survival=None, city=None, lat=None, lon=None):
+    return {"city": city, "lat": lat, "lon": lon, "species": species,
+            "years": years, "trees": trees, "survival": survival}
+
+# ---------- Scenario loading ----------
+def test_load_scenarios_drops_blank_rows_and_applies_aliases(tmp_path):
+    path = tmp_path / "scenarios.csv"
+    path.write_text(
+        "site,species_scientific,years,trees_planted,annual_survival_rate\n"
+        "Pune,Tectona grandis,20,100,0.9\n"
+        ",Azadirachta indica,10,50,\n"
+        "Delhi,,20,100,0.9\n"
+        "Delhi,Tectona grandis,abc,100,\n"
+        "Delhi,Tectona grandis,15,,\n"
+        "  ,  Shorea robusta  ,5,10,\n"
+    )
+    df = batch.load_scenarios(str(path))
+
+    assert df.attrs["dropped_rows"] == [3, 4, 5]
+    assert df["species"].tolist() == ["Tectona grandis", "Azadirachta indica", "Shorea robusta"]
+    assert df["city"].iloc[0] == "Pune" and df["city"].iloc[1:].isna().all()
+    assert df["years"].tolist() == [20, 10, 5]
+    assert df["survival"].isna().tolist() == [False, True, True]
+
+def test_load_scenarios_requires_core_columns(tmp_path):
+    path = tmp_path / "scenarios.csv"
+    path.write_text("species,years\nTectona grandis,20\n")
+    with pytest.raises(ValueError, match="trees"):
+        batch.load_scenarios(str(path))
+
+# ---------- Chunk evaluation ----------
+@pytest.mark.parametrize("species, lat, lon", [
+    ("Tectona grandis", 18.52, 73.86),
+    ("Azadirachta indica", 28.61, 77.21),
+    ("Shorea robusta", None, None),
+])
+def test_run_chunk_matches_compute_curve(worker, app_module, species, lat, lon):
+    df, skipped = batch._run_chunk([_record(species, lat=lat, lon=lon)])
+    expected, err = app_module.compute_curve(species, 20, 100, lat=lat, lon=lon)
+
+    assert err is None and skipped == []
+    assert list(df.columns) == batch.SIM_COLUMNS
+    np.testing.assert_array_equal(df["age_years"], expected["age_years"])
+    np.testing.assert_allclose(df["co2_total_t"], expected["CO2_tons"], rtol=1e-6, atol=1e-6)
+    np.testing.assert_allclose(df["co2_cumulative_t"], expected["CO2_cumulative_tons"], rtol=1e-6, atol=1e-6)
+
+def test_run_chunk_survival_override_and_unknown_species(worker):
+    df, skipped = batch._run_chunk([
+        _record("Tectona grandis", years=5, trees=10, survival=0.5),
+        _record("Not a species"),
+    ])
+    assert skipped == ["Not a species"]
+    assert (df["scenario"] == 0.5).all()
+    np.testing.assert_allclose(df["trees_alive"], (10 * 0.5 ** df["age_years"]).round(2))
+
+def test_run_chunk_empty(worker):
+    df, skipped = batch._run_chunk([_record("Not a species")])
+    assert df.empty and list(df.columns) == batch.SIM_COLUMNS
+    assert skipped == ["Not a species"]
+
+# ---------- Output ----------
+def test_parquet_schema_is_fixed_across_chunks(worker, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "out.parquet")
+    writer = batch._ResultWriter(path)
+    for city in (None, "Pune"):   # first chunk has an all-blank city column
+        df, _ = batch._run_chunk([_record("Tectona grandis", years=3, city=city)])
+        writer.write(df)
+    writer.close()
+
+    table = pq.read_table(path)
+    assert table.schema == batch._parquet_schema(batch.SIM_COLUMNS)
+    assert table.column("city").to_pylist()[-1] == "Pune"
+
+def test_empty_parquet_output_keeps_schema(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "out.parquet")
+    batch._ResultWriter(path).close()
+
+    table = pq.read_table(path)
+    assert table.num_rows == 0
+    assert table.schema == batch._parquet_schema(batch.SIM_COLUMNS)
+
+def test_run_batch_csv(tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    scenarios = tmp_path / "scenarios.csv"
+    scenarios.write_text(
+        "city,lat,lon,species,years,trees\n"
+        "Pune,18.52,73.86,Tectona grandis,10,100\n"
+        "Delhi,28.61,77.21,Nope,10,100\n"
+        ",,,,10,100\n"
+    )
+    out = tmp_path / "out.csv"
+    summary = batch.run_batch(str(scenarios), str(out), workers=1, progress=None)
+
+    result = pd.read_csv(out)
+    assert summary["scenarios"] == 2 and summary["dropped"] == 1
+    assert summary["skipped"] == ["Nope"]
+    assert summary["rows"] == len(result) == 11
+    assert list(result.columns) == batch.SIM_COLUMNS
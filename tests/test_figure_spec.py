@@ -0,0 +1,110 @@
+import base64
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.figure_spec import bin_sums, co2_figure_spec, downsample_index, typed_array
+
+def _decode(spec):
+    return np.frombuffer(base64.b64decode(spec["bdata"]), dtype=np.dtype(spec["dtype"]).newbyteorder("<"))
+
+def _curve(species, n, scale=1.0):
+    ages = np.arange(n)
+    yearly = scale * (ages + 1.0)
+    return pd.DataFrame({"species": species, "age_years": ages,
+                         "CO2_tons": yearly, "CO2_cumulative_tons": np.cumsum(yearly)})
+
+# ---------- Typed arrays ----------
+@pytest.mark.parametrize("values, dtype", [
+    (np.array([0, 5, -7, 127]), "i1"),
+    (np.array([0, 300, -300]), "i2"),
+    (np.array([0, 70000]), "i4"),
+    (np.array([0.5, 1.25, -3.0]), "f4"),
+    (np.array([1.5, 2.5], dtype=">f8"), "f4"),   # big-endian input is written little-endian
+])
+def test_typed_array_round_trip(values, dtype):
+    spec = typed_array(values)
+    assert spec["dtype"] == dtype
+    np.testing.assert_array_equal(_decode(spec), values.astype(dtype))
+
+def test_typed_array_explicit_dtype_and_empty():
+    np.testing.assert_array_equal(_decode(typed_array([1.1, 2.2], "f8")), [1.1, 2.2])
+    assert _decode(typed_array(np.array([], dtype=int))).size == 0
+
+# ---------- Downsampling / binning ----------
+@pytest.mark.parametrize("n, max_points", [(1000, 200), (31, 10), (5, 2), (201, 200)])
+def test_downsample_index_keeps_endpoints(n, max_points):
+    idx = downsample_index(n, max_points)
+    assert idx[0] == 0 and idx[-1] == n - 1
+    assert len(idx) <= max_points
+    assert np.all(np.diff(idx) > 0)
+
+@pytest.mark.parametrize("max_points", [None, 1, 200])
+def test_downsample_index_short_or_disabled(max_points):
+    np.testing.assert_array_equal(downsample_index(31, max_points), np.arange(31))
+
+def test_bin_sums_preserve_totals():
+    x, y = np.arange(31), np.arange(31, dtype=float)
+    first, last, sums = bin_sums(x, y, 10)
+    assert len(sums) <= 10
+    assert sums.sum() == y.sum()
+    assert first[0] == 0 and last[-1] == 30
+    np.testing.assert_array_equal(first[1:], last[:-1] + 1)
+
+def test_bin_sums_short_series_unchanged():
+    first, last, sums = bin_sums(np.arange(5), np.ones(5), 10)
+    np.testing.assert_array_equal(first, last)
+    np.testing.assert_array_equal(sums, np.ones(5))
+
+# ---------- Figure spec ----------
+def test_figure_spec_full_resolution():
+    dfs = [_curve("A", 31), _curve("B", 31, scale=2.0)]
+    data = co2_figure_spec(dfs, max_points=200)["data"]
+
+    assert [t["type"] for t in data] == ["bar", "scatter", "scatter"]
+    np.testing.assert_allclose(_decode(data[0]["y"]), 3.0 * (np.arange(31) + 1.0))
+    np.testing.assert_allclose(_decode(data[2]["y"]), dfs[1]["CO2_cumulative_tons"])
+
+def test_figure_spec_bins_bars_and_samples_lines():
+    dfs = [_curve("A", 31), _curve("B", 31, scale=2.0)]
+    bar, line = co2_figure_spec(dfs, max_points=10)["data"][:2]
+
+    totals = _decode(bar["y"])
+    assert len(totals) <= 10
+    assert totals.sum() == pytest.approx(3.0 * dfs[0]["CO2_tons"].sum())
+    assert bar["hovertext"][0] == "ages 0–3" and sum(bar["width"]) == 31
+
+    ys = _decode(line["y"])
+    assert len(ys) <= 10
+    assert ys[0] == dfs[0]["CO2_cumulative_tons"].iloc[0]
+    assert ys[-1] == pytest.approx(dfs[0]["CO2_cumulative_tons"].iloc[-1])
+
+# ---------- Endpoint ----------
+@pytest.fixture(scope="module")
+def client():
+    import app
+    return app.app.test_client()
+
+def test_figure_endpoint_caches_with_etag(client):
+    url = "/app/figure.json?species=Tectona+grandis&years=20&trees=100"
+    resp = client.get(url)
+    assert resp.status_code == 200 and "ETag" in resp.headers
+    assert resp.get_json()["data"][0]["type"] == "bar"
+    assert client.get(url, headers={"If-None-Match": resp.headers["ETag"]}).status_code == 304
+
+@pytest.mark.parametrize("query", ["years=20", "species=Tectona+grandis&years=abc", "species=Tectona+grandis&trees=1.5"])
+def test_figure_endpoint_bad_request(client, query):
+    assert client.get(f"/app/figure.json?{query}").status_code == 400
+
+def test_dashboard_fills_figure_cache(client, monkeypatch):
+    import app
+    calls = []
+    compute_multi = app.compute_multi
+    monkeypatch.setattr(app, "compute_multi", lambda *a: calls.append(a) or compute_multi(*a))
+
+    form = {"species": ["Tectona grandis", "Shorea robusta"], "years": "17", "trees": "30"}
+    assert client.post("/app", data=form).status_code == 200
+    url = "/app/figure.json?species=Tectona+grandis&species=Shorea+robusta&years=17&trees=30"
+    assert client.get(url).status_code == 200
+    assert len(calls) == 1
@@ -0,0 +1,90 @@
+import math
+
+import numpy as np
+import pytest
+
+from src.inverse import trees_needed, years_needed
+
+TARGET_T = 50.0
+YEARS = 20
+TREES = 100
+
+@pytest.fixture(scope="module")
+def app_module():
+    import app
+    return app
+
+@pytest.fixture(scope="module")
+def index(app_module):
+    return app_module.SPECIES_INDEX
+
+def _curve(app_module, species, years, trees):
+    df, err = app_module.compute_curve(species, years, trees)
+    assert err is None
+    return df
+
+# ---------- Cross-checks against the forward model ----------
+def test_trees_needed_matches_compute_curve(app_module, index):
+    res = trees_needed(index, TARGET_T, YEARS)
+    assert sorted(res["species"]) == sorted(index["species"])
+
+    for sp, need, per_tree in zip(res["species"], res["trees_needed"], res["co2_per_tree_t"]):
+        cum = _curve(app_module, sp, YEARS, 1)["CO2_cumulative_tons"].iloc[-1]
+        assert per_tree == pytest.approx(cum, rel=1e-9), sp
+        assert need == math.ceil(TARGET_T / cum), sp
+
+def test_years_needed_matches_compute_curve(app_module, index):
+    res = years_needed(index, TARGET_T, TREES)
+
+    for sp, yrs in zip(res["species"], res["years_needed"]):
+        df = _curve(app_module, sp, int(index["ages"][-1]), TREES)
+        reached = df.loc[df["CO2_cumulative_tons"] >= TARGET_T, "age_years"]
+        if reached.empty:
+            assert np.isnan(yrs), sp
+        else:
+            assert yrs == reached.iloc[0], sp
+
+def test_rankings_are_sorted(index):
+    by_trees = trees_needed(index, TARGET_T, YEARS)["trees_needed"]
+    by_years = years_needed(index, TARGET_T, TREES)["years_needed"]
+    for arr in (by_trees, by_years):
+        finite = arr[~np.isnan(arr)]
+        assert np.all(np.diff(finite) >= 0)
+        assert not np.any(np.isnan(arr[:len(finite)]))
+
+def test_survival_override_needs_more_trees(index):
+    def need(**kw):
+        res = trees_needed(index, TARGET_T, YEARS, **kw)
+        return dict(zip(res["species"], res["trees_needed"]))
+
+    base, worse = need(), need(survival=0.5)
+    assert all(worse[sp] >= base[sp] for sp in base if not np.isnan(base[sp]))
+
+# ---------- solve_target / API ----------
+@pytest.mark.parametrize("target_t, years, trees", [
+    (float("inf"), YEARS, TREES),
+    (float("nan"), YEARS, TREES),
+    (0.0, YEARS, TREES),
+    (TARGET_T, -1, TREES),
+    (TARGET_T, YEARS, 0),
+])
+def test_solve_target_rejects_bad_input(app_module, target_t, years, trees):
+    result, err = app_module.solve_target(target_t, years, trees)
+    assert result is None and err
+
+@pytest.mark.parametrize("query", [
+    "",
+    "target_t=abc",
+    "target_t=inf",
+    "target_t=5&years=abc",
+    "target_t=5&trees=1.5",
+    "target_t=5&years=-1",
+])
+def test_api_inverse_bad_request(app_module, query):
+    assert app_module.app.test_client().get(f"/api/inverse?{query}").status_code == 400
+
+def test_api_inverse(app_module):
+    resp = app_module.app.test_client().get(f"/api/inverse?target_t={TARGET_T}&years={YEARS}&trees={TREES}")
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert len(body["trees_needed"]) == len(body["years_needed"]) == len(app_module.SPECIES_INDEX["species"])
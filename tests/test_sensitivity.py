@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from src.data_loader import load_growth_curves, load_species_master
+from src.inverse import build_inverse_index
+from src.sensitivity import PARAMS, elasticities, sensitivity_summary, tornado
+from src.tables import build_species_tables
+
+YEARS = 20
+H = 1e-4   # relative step for finite differences
+
+@pytest.fixture(scope="module")
+def data():
+    return load_growth_curves(), load_species_master()
+
+@pytest.fixture(scope="module")
+def index(data):
+    return build_inverse_index(build_species_tables(*data))
+
+def _weights(index, survival=None):
+    surv = index["survival"] if survival is None else survival
+    return index["yearly_t"] * surv[:, None] ** index["ages"]
+
+def _cum(index, **kw):
+    return np.cumsum(_weights(index, **kw), axis=1)[:, YEARS]
+
+def _fd(lo, hi):
+    """Central finite-difference elasticity from values at p·(1 ∓ H)."""
+    return (np.log(hi) - np.log(lo)) / (np.log1p(H) - np.log1p(-H))
+
+@pytest.fixture(scope="module")
+def analytic(index):
+    el = elasticities(_weights(index), index["ages"], index["R"], index["rho_elasticity"])
+    return {p: el[p][:, YEARS] for p in PARAMS}
+
+# ---------- Analytic elasticities vs finite differences ----------
+def test_survival_elasticity_matches_finite_difference(index, analytic):
+    lo = _cum(index, survival=index["survival"] * (1 - H))
+    hi = _cum(index, survival=index["survival"] * (1 + H))
+    np.testing.assert_allclose(analytic["survival"], _fd(lo, hi), rtol=1e-6)
+
+def test_survival_elasticity_known_value(index, analytic):
+    i = list(index["species"]).index("Tectona grandis")
+    assert analytic["survival"][i] == pytest.approx(12.1096, abs=1e-4)
+
+@pytest.mark.parametrize("param, column", [
+    ("wood_density", "wood_density_g_cm3"),
+    ("carbon_fraction", "carbon_fraction_CF"),
+    ("root_to_shoot", "root_to_shoot_ratio_R"),
+])
+def test_parameter_elasticity_matches_rebuilt_tables(data, index, analytic, param, column):
+    growth, master = data
+
+    def rebuilt(f):
+        scaled = master.assign(**{column: master[column] * f})
+        return build_inverse_index(build_species_tables(growth, scaled))["cum_t"][:, YEARS]
+
+    np.testing.assert_allclose(analytic[param], _fd(rebuilt(1 - H), rebuilt(1 + H)), rtol=1e-6)
+
+def test_multiplier_and_carbon_fraction_are_unit_elastic(analytic):
+    assert np.all(analytic["climate_multiplier"] == 1.0)
+    assert np.all(analytic["carbon_fraction"] == 1.0)
+
+def test_elasticities_nan_before_any_co2():
+    el = elasticities(np.array([[0.0, 0.0, 2.0]]), np.arange(3), [0.3], [0.976])
+    for p in PARAMS:
+        assert np.isnan(el[p][0, :2]).all() and np.isfinite(el[p][0, 2])
+
+# ---------- Tornado ----------
+def test_tornado_ranges(index):
+    tor = tornado(index, YEARS, trees=100, multiplier=1.2, delta=0.1)
+    base = tor["base"][:, -1]
+    np.testing.assert_allclose(base, 100 * 1.2 * index["cum_t"][:, YEARS])
+
+    np.testing.assert_allclose(tor["carbon_fraction"]["high"][:, -1], 1.1 * base)
+    np.testing.assert_allclose(tor["wood_density"]["low"][:, -1], 0.9 ** index["rho_elasticity"] * base)
+
+    surv_hi = np.minimum(index["survival"] * 1.1, 1.0)
+    np.testing.assert_allclose(tor["survival"]["high"][:, -1], 120 * _cum(index, survival=surv_hi))
+    for p in PARAMS:
+        assert np.all(tor[p]["low"] <= tor["base"] + 1e-12)
+        assert np.all(tor[p]["high"] >= tor["base"] - 1e-12)
+
+def test_sensitivity_summary_sorted_by_swing(index):
+    summary = sensitivity_summary(index, ["Tectona grandis", "Not a species"], YEARS, 100)
+    assert [s["species"] for s in summary] == ["Tectona grandis"]
+    swings = [p["swing_t"] for p in summary[0]["params"]]
+    assert swings == sorted(swings, reverse=True)
+    assert {p["param"] for p in summary[0]["params"]} == set(PARAMS)
+
+# ---------- Batch --sensitivity columns ----------
+def test_batch_elasticity_columns(index, analytic):
+    from src import batch
+
+    batch._init_worker(use_climate=False, sensitivity=True)
+    try:
+        df, _ = batch._run_chunk([{"city": None, "lat": None, "lon": None, "species": "Tectona grandis",
+                                   "years": YEARS, "trees": 100, "survival": None}])
+    finally:
+        batch._init_worker()
+
+    i = list(index["species"]).index("Tectona grandis")
+    assert list(df.columns) == batch.SIM_COLUMNS + batch.ELASTICITY_COLUMNS
+    for p in PARAMS:
+        assert df[f"elasticity_{p}"].iloc[-1] == pytest.approx(analytic[p][i], abs=1e-6)
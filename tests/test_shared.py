@@ -0,0 +1,82 @@
+import os
+import stat
+
+import numpy as np
+import pytest
+
+from src import climate, shared
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# ---------- Private per-instance directory ----------
+def test_create_dir_is_private_and_unique(tmp_path):
+    a, b = shared.create_dir(str(tmp_path)), shared.create_dir(str(tmp_path))
+    assert a != b
+    for d in (a, b):
+        st = os.stat(d)
+        assert stat.S_IMODE(st.st_mode) == 0o700 and st.st_uid == os.getuid()
+
+def test_remove_dir_only_in_owner_process(tmp_path):
+    d = shared.create_dir(str(tmp_path))
+    shared.remove_dir(d, owner_pid=os.getpid() + 1)   # e.g. a forked worker exiting
+    assert os.path.isdir(d)
+    shared.remove_dir(d, owner_pid=os.getpid())
+    assert not os.path.exists(d)
+
+def test_refuses_writable_directory(tmp_path):
+    d = tmp_path / "planted"
+    d.mkdir()
+    d.chmod(0o777)
+    with pytest.raises(RuntimeError, match="Refusing"):
+        shared.share_index({"species": np.array(["A"], dtype=object), "x": np.zeros(1)}, str(d))
+
+@pytest.mark.skipif(not hasattr(os, "geteuid") or os.geteuid() != 0, reason="needs root to chown")
+def test_refuses_directory_owned_by_another_user(tmp_path):
+    d = tmp_path / "planted"
+    d.mkdir(mode=0o700)
+    os.chown(d, 65534, 65534)
+    with pytest.raises(RuntimeError, match="Refusing"):
+        shared.share_index({"species": np.array(["A"], dtype=object), "x": np.zeros(1)}, str(d))
+
+# ---------- Species index ----------
+def test_share_index_round_trip(tmp_path):
+    index = {
+        "species": np.array(["A", "B"], dtype=object),
+        "ages": np.arange(4),
+        "cum_t": np.arange(8, dtype=float).reshape(2, 4),
+        "survival": np.array([0.9, 0.95]),
+    }
+    out = shared.share_index(index, shared.create_dir(str(tmp_path)))
+
+    assert list(out["species"]) == ["A", "B"]
+    for k in ("ages", "cum_t", "survival"):
+        np.testing.assert_array_equal(out[k], index[k])
+        assert isinstance(out[k], np.memmap) and not out[k].flags.writeable
+
+# ---------- Climate grids vs rasterio ----------
+@pytest.fixture
+def grids(tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    if not os.path.exists(climate.WC_PATH_BIO1):
+        pytest.skip("WorldClim rasters not available")
+    return shared.share_climate_grids(shared.create_dir(str(tmp_path)))
+
+def test_sample_grid_matches_rasterio(grids):
+    rng = np.random.default_rng(0)
+    lats = rng.uniform(-60, 80, 2000)
+    lons = rng.uniform(-180, 180, 2000)
+
+    climate.use_grids(None)
+    expected = [climate.climate_at_latlon(lat, lon) for lat, lon in zip(lats, lons)]
+    climate.use_grids(grids)
+    try:
+        got = [climate.climate_at_latlon(lat, lon) for lat, lon in zip(lats, lons)]
+    finally:
+        climate.use_grids(None)
+
+    assert got == expected
+    assert sum(v != (None, None) for v in got) > 500   # plenty of land pixels sampled
+
+def test_sample_grid_outside_extent(grids):
+    assert climate._sample_grid(grids["bio1"], 200.0, 0.0) is None
+    assert climate._sample_grid(grids["bio1"], 0.0, -95.0) is None